@@ -71,17 +71,71 @@ Being Variables the default if it cannot be determined that an element belongs
 to any of other categories.
 """
 
+import re
+from sys import modules, intern
 from logging import getLogger
 from pkgutil import iter_modules
 from traceback import format_exc
 from importlib import import_module
-from collections import OrderedDict
-from inspect import isclass, isfunction, ismodule, isbuiltin, isroutine, \
-    getmembers
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from inspect import ismodule
+from types import FunctionType, BuiltinFunctionType, ModuleType
 
 
 log = getLogger(__name__)
 
+# Private names start with a single _, or with __ but no trailing __
+PRIVATE_RE = re.compile(r'^_(?!_)|^__(?!.*__$)')
+
+# Special names start or end with __
+SPECIAL_RE = re.compile(r'^__|__$')
+
+# Marker for missing attributes, so they are fetched with a single getattr()
+_MISSING = object()
+
+# Same as inspect.isfunction() or inspect.isbuiltin()
+ROUTINE_TYPES = (FunctionType, BuiltinFunctionType)
+
+
+def is_documented(obj):
+    """
+    Check if an object has a docstring.
+    """
+    return bool(getattr(obj, '__doc__', None))
+
+
+def is_private(name):
+    """
+    Check if a member name is private.
+
+    Private members are defined as starting with ``_`` or ``__``, but no
+    trailing ``__``.
+    """
+    return PRIVATE_RE.match(name) is not None
+
+
+def is_special(name):
+    """
+    Check if a member name is special.
+
+    Special members are defined as starting or ending with ``__``.
+    """
+    return SPECIAL_RE.search(name) is not None
+
+
+def copy_opts(opts):
+    """
+    Copy a public object options dictionary.
+
+    The dictionary and its ``directives`` list are copied, so the object can
+    be customized (for example, by ``autoapi-process-node`` handlers) without
+    affecting any other object.
+    """
+    opts = dict(opts)
+    opts['directives'] = list(opts['directives'])
+    return opts
+
 
 class APINode(object):
     """
@@ -92,31 +146,38 @@ class APINode(object):
     :param dict directory: Directory to store the index of all the modules.
      If None, the default, the root node will create one a pass it to the
      subnodes.
+    :param bool lazy: If True, subnodes are not imported nor built until they
+     are first accessed, for example when walking the tree. Only the
+     accessed branches are registered in the directory. Checking if a node is
+     a leaf builds its subnodes, as any of them may fail to import.
+    :param int import_workers: Number of threads used to import concurrently
+     the submodules of each package. If None, the default, submodules are
+     imported one by one.
 
     **Attributes:**
 
     :var name: Name of the current module.
     :var subname: Last part of the name of this module. For example if name is
      ``my.module.another`` the subname will be ``another``.
-    :var directory: Directory of the tree. This is a :py:class:`OrderedDict`
+    :var directory: Directory of the tree. This is a :py:class:`dict`
      that will register all modules name with it's associated node
      :class:`APINode`. All nodes of a tree share this index and thus
      the whole tree can be queried from any node.
     :var module: The loaded module.
     :var subnodes: A list of :class:`APINode` with all child submodules
-     and subpackages.
+     and subpackages. On lazy trees it is built on first access.
     :var subnodes_failed: A list of submodules and subpackages names that
      failed to import.
 
     **Public API categories:**
 
-    :var functions: A :py:class:`OrderedDict` of all functions found in the
+    :var functions: A :py:class:`dict` of all functions found in the
      public API of the module.
-    :var classes: A :py:class:`OrderedDict` of all classes found in the
+    :var classes: A :py:class:`dict` of all classes found in the
      public API of the module.
-    :var exceptions: A :py:class:`OrderedDict` of all exceptions found in the
+    :var exceptions: A :py:class:`dict` of all exceptions found in the
      public API of the module.
-    :var variables: A :py:class:`OrderedDict` of all other elements found in
+    :var variables: A :py:class:`dict` of all other elements found in
      the public API of the module.
 
     In all categories the order on which the elements are listed is preserved.
@@ -124,74 +185,80 @@ class APINode(object):
 
     autoapi_process_node_func_name = 'autoapi-process-node'
 
-    def __init__(self, name, directory=None, *, prebuilt=False, context={}):
-        self.name = name
+    def __init__(
+        self, name, directory=None, *,
+        prebuilt=False, context=None, lazy=False, import_workers=None,
+        _module_cache=None, _executor=None
+    ):
+        if context is None:
+            context = {}
+
+        if import_workers is not None and (
+            not isinstance(import_workers, int)
+            or isinstance(import_workers, bool)
+            or import_workers < 1
+        ):
+            raise ValueError(
+                'import_workers must be a positive integer or None, '
+                'got {!r}'.format(import_workers)
+            )
+
+        # Names are interned as they are used as keys of the shared directory
+        self.name = intern(name)
+        self._parts = name.split('.')
         self.context = context
         self.opts = {
             'rst-pre-title': []
         }
-        if prebuilt:
-            root_name = name.split('.')[0]
-            root_mod = import_module(root_name)
-            _root_mod = root_mod
-            for mod in name.split('.')[1:]:
-                _root_mod = getattr(_root_mod, mod)
-            self.module = _root_mod
-        else:
-            self.module = import_module(name)
-        self.subname = name.split('.')[-1]
+        self._module_cache = {}
+        if _module_cache is not None:
+            self._module_cache = _module_cache
+        self.module = self._import_module(prebuilt)
+        self.subname = intern(self._parts[-1])
         self.prebuilt = prebuilt or self.is_prebuilt()
 
-        self.functions = OrderedDict()
-        self.classes = OrderedDict()
-        self.exceptions = OrderedDict()
-        self.variables = OrderedDict()
-        self.api = OrderedDict((
-            ('functions', self.functions),
-            ('classes', self.classes),
-            ('exceptions', self.exceptions),
-            ('variables', self.variables),
-        ))
-
-        self.subnodes = []
+        self.functions = {}
+        self.classes = {}
+        self.exceptions = {}
+        self.variables = {}
+        self.api = {
+            'functions': self.functions,
+            'classes': self.classes,
+            'exceptions': self.exceptions,
+            'variables': self.variables,
+        }
+
         self.subnodes_failed = []
 
-        self.directory = OrderedDict()
+        self.directory = {}
         if directory is not None:
             self.directory = directory
 
+        self.lazy = lazy
+        self.import_workers = import_workers
+        self._subnodes = None
+        self._is_leaf = None
+        self._subnode_specs = []
         self._relevant = None
 
         # Now that all node public attributes exists and module was imported
-        # register itself in the directory
+        # register itself in the directory. The first node registered is the
+        # root of the tree.
+        self._is_root = not self.directory
         self.directory[self.name] = self
 
-        # Check if package and iterate over subnodes
+        # Check if package and collect its subnodes
         if hasattr(self.module, '__path__'):
             for _, subname, _ in iter_modules(
                     self.module.__path__, self.module.__name__ + '.'):
-                log.info('Recursing into {}'.format(subname))
-
-                try:
-                    subnode = APINode(
-                        subname,
-                        self.directory,
-                        context=self.context
-                    )
-                    self.subnodes.append(subnode)
-                except Exception:
-                    log.error('Failed to import {}'.format(subname))
-                    log.error(format_exc())
-                    self.subnodes_failed.append(subname)
-        elif self.is_prebuilt() or prebuilt:
+                self._subnode_specs.append((subname, subname, False))
+        elif self.prebuilt:
             log.info(f'Building API for prebuilt {self.module.__name__}')
 
             for public_key in ['__all__', '__api__']:
-                if not hasattr(self.module, public_key):
-                    continue
-
-                for subname in getattr(self.module, public_key):
-                    if not hasattr(self.module, subname):
+                for subname in getattr(self.module, public_key, ()):
+                    submod = getattr(self.module, subname, _MISSING)
+                    if submod is _MISSING:
                         log.warning(
                             "Module {} doesn't have a element {}".format(
                                 self.name,
@@ -199,24 +266,17 @@ class APINode(object):
                             )
                         )
                         continue
-                    elif ismodule(getattr(self.module, subname)):
-                        submod = getattr(self.module, subname)
-                        try:
-                            mod_name = f'{self.name}.{submod.__name__}'
-                            subnode = APINode(
-                                mod_name,
-                                self.directory,
-                                prebuilt=True,
-                                context=self.context
-                            )
-                            self.subnodes.append(subnode)
-                        except Exception:
-                            log.error('Failed to import {}'.format(subname))
-                            log.error(format_exc())
-                            self.subnodes_failed.append(subname)
+                    elif ismodule(submod):
+                        mod_name = f'{self.name}.{submod.__name__}'
+                        self._module_cache[mod_name] = submod
+                        self._subnode_specs.append((subname, mod_name, True))
+
+        # Unless lazy, build the subnodes right away
+        if not lazy:
+            self._build_subnodes(_executor)
 
         # Fetch all public objects
-        public = OrderedDict()
+        public = {}
 
         # If the 'class_members' option was given, build the API out of that.
         # Like autodoc's setting though:
@@ -224,80 +284,177 @@ class APINode(object):
         if (not (
             hasattr(self.module, '__api__')
             or hasattr(self.module, '__all__')
-        ) and self.context['module-members']):
-
-            # Start with all members and gradually shrink the set down
-            # with the given options
-            keys = getmembers(self.module)
-            if 'undoc-members' not in self.context['module-members']:
-                # Remove undocumented items
-                keys = self.filter_out_nodoc(keys)
-            if 'private-members' not in self.context['module-members']:
-                # Remove private members
-                # Private members are defined as starting with
-                # '_' or '__', but no trailing '__'
-                keys = self.filter_out_private(keys)
-            if 'special-members' not in self.context['module-members']:
-                # Remove special members.
-                # Special members are defined as starting or ending with, '__'
-                keys = self.filter_out_special(keys)
-            keys = self.filter_out_external(keys)
-            for k in keys:
-                public[k[0]] = k[1]
+        ) and self.context.get('module-members')):
+
+            # Filter all members in a single pass with the given options.
+            # Names are filtered before fetching the members so attributes
+            # that will be discarded anyway are never accessed.
+            members = self.context['module-members']
+            undoc = 'undoc-members' in members
+            private = 'private-members' in members
+            special = 'special-members' in members
+            modname = self.module.__name__
+            match_private = PRIVATE_RE.match
+            search_special = SPECIAL_RE.search
+
+            for obj_name in dir(self.module):
+                if (
+                    (not private and match_private(obj_name))
+                    or (not special and search_special(obj_name))
+                ):
+                    continue
+
+                obj = getattr(self.module, obj_name, _MISSING)
+                if obj is _MISSING:
+                    continue
+
+                if (
+                    (undoc or is_documented(obj))
+                    and getattr(obj, '__module__', None) == modname
+                ):
+                    public[obj_name] = obj
         else:
             for public_key in self.public_keys:
-                if not hasattr(self.module, public_key):
+                obj_names = getattr(self.module, public_key, _MISSING)
+                if obj_names is _MISSING:
                     continue
 
-                for obj_name in getattr(self.module, public_key):
-                    if not hasattr(self.module, obj_name):
+                for obj_name in obj_names:
+                    obj = getattr(self.module, obj_name, _MISSING)
+                    if obj is _MISSING:
                         log.warning(
                             'Module {} doesn\'t have a element {}'.format(
                                 self.name, obj_name
                             )
                         )
                         continue
-                    public[obj_name] = getattr(self.module, obj_name)
+                    public[obj_name] = obj
                 break
 
         # Categorize objects
+        # Dispatch on the type of the object instead of going through the
+        # inspect predicates, which are just wrappers around isinstance()
+        exclude = context.get('exclude-members', ())
+        functions = self.functions
+        classes = self.classes
+        exceptions = self.exceptions
+        variables = self.variables
+
+        # Default options are the same for all the objects of a category, so
+        # they are built once and each object gets its own copy
+        function_opts = self.default_function_opts()
+        class_opts = self.default_class_opts()
+        exception_opts = self.default_exception_opts()
+        variable_opts = self.default_variable_opts()
+
         for obj_name, obj in public.items():
-            if (
-                'exclude-members' in context
-                and obj_name in context['exclude-members']
-            ):
+            if obj_name in exclude:
                 continue
 
-            if isclass(obj):
+            if isinstance(obj, type):
                 if issubclass(obj, Exception):
-                    self.exceptions[obj_name] = (
-                        obj,
-                        self.default_exception_opts()
-                    )
+                    exceptions[obj_name] = (obj, copy_opts(exception_opts))
                     continue
-                self.classes[obj_name] = (
-                    obj,
-                    self.default_class_opts()
-                )
+                classes[obj_name] = (obj, copy_opts(class_opts))
                 continue
-            if isfunction(obj) or (isbuiltin(obj) and isroutine(obj)):
-                self.functions[obj_name] = (
-                    obj,
-                    self.default_function_opts()
-                )
+            if isinstance(obj, ROUTINE_TYPES):
+                functions[obj_name] = (obj, copy_opts(function_opts))
                 continue
-            if ismodule(obj):
+            if isinstance(obj, ModuleType):
                 continue
-            self.variables[obj_name] = (obj, self.default_variable_opts())
-
-        # Flag to mark if this branch is relevant
-        # For self._relevant, None means undertermined
-        if self.is_root():
-            self.is_relevant()
+            variables[obj_name] = (obj, copy_opts(variable_opts))
 
         if 'app' in context:
             context['app'].emit(self.autoapi_process_node_func_name, self)
 
+        # Unless lazy, cache if this branch is relevant. Subnodes are fully
+        # built at this point, so relevancy is resolved post-order and later
+        # queries doesn't need to walk the subtree.
+        if not lazy:
+            self.is_relevant()
+
+    @property
+    def subnodes(self):
+        """
+        List of :class:`APINode` with all child submodules and subpackages.
+
+        Subnodes are built and registered in the directory on first access.
+        """
+        if self._subnodes is None:
+            self._build_subnodes()
+        return self._subnodes
+
+    @subnodes.setter
+    def subnodes(self, subnodes):
+        self._subnodes = subnodes
+        self._is_leaf = not subnodes
+
+    def _build_subnodes(self, executor=None):
+        """
+        Build the subnodes of this node and register them in the directory.
+
+        If ``import_workers`` is set, submodules are imported with a thread
+        pool that only lives during the build. ``executor`` is the pool of an
+        ongoing build up in the tree, which is reused by the subnodes that are
+        built as part of it.
+        """
+        if executor is None and self.import_workers is not None:
+            with ThreadPoolExecutor(
+                    max_workers=self.import_workers) as executor:
+                self._build_subnodes(executor)
+            return
+
+        self._subnodes = []
+        if executor is not None:
+            self._preimport_submodules(executor)
+
+        for subname, mod_name, prebuilt in self._subnode_specs:
+            log.info('Recursing into {}'.format(mod_name))
+
+            try:
+                subnode = APINode(
+                    mod_name,
+                    self.directory,
+                    prebuilt=prebuilt,
+                    context=self.context,
+                    lazy=self.lazy,
+                    import_workers=self.import_workers,
+                    _module_cache=self._module_cache,
+                    _executor=executor
+                )
+                self._subnodes.append(subnode)
+            except Exception:
+                log.error('Failed to import {}'.format(subname))
+                log.error(format_exc())
+                self.subnodes_failed.append(subname)
+
+        self._is_leaf = not self._subnodes
+
+    def _preimport_submodules(self, executor):
+        """
+        Import the submodules of this package concurrently with ``executor``
+        and register them in the module cache.
+
+        Importing is mostly I/O bound, so threads can overlap it. Subnodes are
+        still built in order by the caller, which will find their modules in
+        the cache. Submodules that fail to import are left out of the cache,
+        so the failure is reported when building its subnode.
+        """
+        names = [
+            mod_name for _, mod_name, prebuilt in self._subnode_specs
+            if not prebuilt and mod_name not in self._module_cache
+        ]
+        if len(names) < 2:
+            return
+
+        futures = [
+            (name, executor.submit(import_module, name))
+            for name in names
+        ]
+        for name, future in futures:
+            if future.exception() is None:
+                self._module_cache[name] = future.result()
+
     def has_public_api(self):
         """
         Check if this node has a public API.
@@ -305,7 +462,10 @@ class APINode(object):
         :rtype: bool
         :return: True if any category has at least one element.
         """
-        return any(self.api.values())
+        return bool(
+            self.functions or self.classes
+            or self.exceptions or self.variables
+        )
 
     def is_leaf(self):
         """
@@ -317,7 +477,11 @@ class APINode(object):
         :rtype: bool
         :return: True if no other subnodes exists for this node.
         """
-        return not self.subnodes
+        # Submodules may fail to import, so on lazy trees the subnodes must be
+        # built to know if this node is a leaf
+        if self._subnodes is None:
+            self._build_subnodes()
+        return self._is_leaf
 
     def is_root(self):
         """
@@ -326,9 +490,7 @@ class APINode(object):
         :rtype: bool
         :return: True if the current node is the root node.
         """
-        for key in self.directory.keys():
-            return key == self.name
-        raise Exception('Empty directory!')
+        return self._is_root
 
     def is_relevant(self):
         """
@@ -337,21 +499,17 @@ class APINode(object):
         A branch is relevant if the current node has a public API or if any of
         its subnodes is relevant (in order to reach relevant nodes).
 
-        Relevancy is determined at initialization by the root node.
+        Relevancy is determined at initialization by each node, once all its
+        subnodes were built. On lazy trees it is determined on first call,
+        building the subtree as needed.
 
         :rtype: bool
         :return: True if the current node is relevant.
         """
-        if self._relevant is not None:
-            return self._relevant
-
-        relevant = False
-        if self.has_public_api() or \
-                any(s.is_relevant() for s in self.subnodes):
-            relevant = True
-
-        self._relevant = relevant
-
+        if self._relevant is None:
+            self._relevant = self.has_public_api() or any(
+                s.is_relevant() for s in self.subnodes
+            )
         return self._relevant
 
     def depth(self):
@@ -362,7 +520,7 @@ class APINode(object):
         :return: The depth of the node. For example, for node ``my.add.foo``
          the depth is 3.
         """
-        return len(self.name.split('.'))
+        return len(self._parts)
 
     def get_module(self, name):
         """
@@ -378,24 +536,28 @@ class APINode(object):
 
     def walk(self):
         """
-        Traverse the tree top-down.
+        Traverse the tree top-down, breadth first.
 
         :return: This method will yield tuples ``(node, [leaves])`` for each
-         node in the tree.
+         non-leaf node in the tree.
         """
-        if self.is_leaf():
-            raise StopIteration()
+        queue = deque([self])
+        while queue:
+            node = queue.popleft()
+            if node.is_leaf():
+                continue
 
-        yield (self, [n for n in self.subnodes if n.is_leaf()])
+            leaves = []
+            for subnode in node.subnodes:
+                if subnode.is_leaf():
+                    leaves.append(subnode)
+                else:
+                    queue.append(subnode)
 
-        for subnode in [n for n in self.subnodes if not n.is_leaf()]:
-            for step in subnode.walk():
-                yield step
+            yield (node, leaves)
 
-    # pylint: disable=non-iterator-returned
     def __iter__(self):
-        return self.walk
-    # pylint: enable=non-iterator-returned
+        return self.walk()
 
     def tree(self, level=0, fullname=True):
         """
@@ -422,66 +584,93 @@ class APINode(object):
         :param bool fullname: Plot the full name of the module or just it's
          subname.
         """
-        name = [('    ' * level)]
-        if fullname:
-            name.append(self.name)
-        else:
-            name.append(self.subname)
-
-        tags = []
-        for tag, category in zip(['f', 'c', 'e', 'v'], self.api.values()):
-            if category:
-                tags.append(tag)
-        if tags:
-            name.append(' [{}]'.format(', '.join(tags)))
-
-        output = [''.join(name)]
-        for subnode in self.subnodes:
-            output.append(subnode.tree(level=level + 1, fullname=fullname))
+        # Traverse the subtree depth first with a stack and join all the
+        # lines once at the end
+        output = []
+        stack = [(self, level)]
+        while stack:
+            node, level = stack.pop()
+
+            name = ['    ' * level]
+            if fullname:
+                name.append(node.name)
+            else:
+                name.append(node.subname)
+
+            tags = [
+                tag for tag, category in (
+                    ('f', node.functions),
+                    ('c', node.classes),
+                    ('e', node.exceptions),
+                    ('v', node.variables),
+                ) if category
+            ]
+            if tags:
+                name.append(' [{}]'.format(', '.join(tags)))
+
+            output.append(''.join(name))
+            stack.extend(
+                (subnode, level + 1) for subnode in reversed(node.subnodes)
+            )
         return '\n'.join(output)
 
+    def _import_module(self, prebuilt):
+        """
+        Get the module of this node, reusing the module cache shared
+        by all the nodes of the tree.
+
+        Prebuilt modules can't be imported directly, so they are resolved
+        by attribute lookup starting from the closest ancestor already
+        resolved.
+        """
+        name = self.name
+        module = self._module_cache.get(name)
+        if module is not None:
+            return module
+
+        if not prebuilt:
+            module = import_module(name)
+        else:
+            module = modules.get(name)
+            if module is None:
+                parts = self._parts
+                for index in range(len(parts) - 1, 0, -1):
+                    module = self._module_cache.get('.'.join(parts[:index]))
+                    if module is not None:
+                        break
+                else:
+                    index = 1
+                    module = import_module(parts[0])
+                for part in parts[index:]:
+                    module = getattr(module, part)
+
+        self._module_cache[name] = module
+        return module
+
     def is_prebuilt(self):
         """
             Indicates if the current node is derived from a
             ``prebuilt library`` by checking for ``.pyd`` or
             ``.so`` in the modules ``__file__`` attribute.
         """
-        if hasattr(self.module, '__file__'):
-            f = getattr(self.module, '__file__')
-            if f.endswith('.pyd') or f.endswith('.so'):
-                return True
-        return False
+        f = getattr(self.module, '__file__', None)
+        return f is not None and f.endswith(('.pyd', '.so'))
 
     def filter_out_nodoc(self, members):
-        return list(filter(
-            lambda m: not hasattr(m[1], '__doc__'),
-            members)
-        )
+        return [m for m in members if is_documented(m[1])]
 
     def filter_out_private(self, members):
-        return list(filter(
-            lambda m: (not ((str(m[0]).startswith('__')
-                             and not str(m[0]).endswith('__'))
-                            or str(m[0]).startswith('_'))
-                       ),
-            members)
-        )
+        return [m for m in members if not is_private(m[0])]
 
     def filter_out_special(self, members):
-        return list(filter(
-            lambda m: (not (str(m[0]).startswith('__')
-                            or str(m[0]).endswith('__'))
-                       ),
-            members)
-        )
+        return [m for m in members if not is_special(m[0])]
 
     def filter_out_external(self, members):
-        return list(filter(
-            lambda m: (hasattr(m[1], '__module__')
-                       and m[1].__module__ == self.module.__name__
-                       ),
-            members)
-        )
+        modname = self.module.__name__
+        return [
+            m for m in members
+            if getattr(m[1], '__module__', None) == modname
+        ]
 
     @property
     def public_keys(self):
@@ -498,8 +687,9 @@ class APINode(object):
 
     def default_class_opts(self):
         opts = self.default_opts()
-        if 'class-members' in self.context:
-            opts['directives'] = self.context['class-members']
+        class_members = self.context.get('class-members')
+        if class_members is not None:
+            opts['directives'] = list(class_members)
         else:
             opts['directives'].append('members')
         return opts
@@ -127,7 +127,8 @@ def builder_inited(app):
             'orphan': False,
             'module-members': [],
             'class-members': [],
-            'exclude-members': []
+            'exclude-members': [],
+            'import-workers': None
         }
 
         # Unless the user explicitly passed in the option, base the
@@ -153,7 +154,8 @@ def builder_inited(app):
                 'module-members': options['module-members'],
                 'class-members': options['class-members'],
                 'exclude-members': options['exclude-members'],
-            }
+            },
+            import_workers=options['import-workers']
         )
 
         # Gather nodes to document
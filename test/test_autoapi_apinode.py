@@ -21,6 +21,8 @@ Test suite for module autoapi.apinode.
 See http://pythontesting.net/framework/pytest/pytest-introduction/#fixtures
 """
 
+import threading
+
 import pytest  # noqa
 
 from origen_autoapi import APINode
@@ -39,11 +41,14 @@ def test_autotree():
     assert tree.has_public_api()
     assert tree.get_module('origen_autoapi.apinode') is not None
     assert not tree.get_module('origen_autoapi.apinode').is_relevant()
+    assert not tree.get_module('origen_autoapi.apinode').is_root()
     assert tree.tree()
     assert tree.tree(fullname=False)
     assert repr(tree)
     assert str(tree)
 
+    assert list(tree) == list(tree.walk())
+
     depth = 1
     for node, leaves in tree.walk():
         assert not node.is_leaf()
@@ -52,3 +57,125 @@ def test_autotree():
             assert leaf.is_leaf()
             assert leaf.depth() == depth + 1
         depth += 1
+
+    # Tags reflect the categories changed after initialization
+    assert tree.tree().splitlines()[0] == 'origen_autoapi [c]'
+    tree.variables['VARIABLE'] = (None, {'directives': []})
+    assert tree.tree().splitlines()[0] == 'origen_autoapi [c, v]'
+
+    # Leaves have nothing to walk
+    assert not list(tree.get_module('origen_autoapi.apinode').walk())
+
+
+def test_module_members(tmp_path, monkeypatch):
+    """
+    Check that module members are filtered by the given options when the
+    module doesn't declare a public API.
+    """
+    (tmp_path / 'members_mod.py').write_text(
+        'def documented():\n'
+        '    """Documented."""\n'
+        '\n'
+        'def undocumented():\n'
+        '    pass\n'
+        '\n'
+        'def _private():\n'
+        '    """Private."""\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    tree = APINode('members_mod')
+    assert not tree.has_public_api()
+
+    tree = APINode('members_mod', context={'module-members': ['members']})
+    assert list(tree.functions) == ['documented']
+
+    tree = APINode(
+        'members_mod',
+        context={'module-members': ['undoc-members', 'private-members']}
+    )
+    assert list(tree.functions) == ['_private', 'documented', 'undocumented']
+
+
+def test_lazy_autotree():
+    """
+    Check that a lazy tree only builds the subnodes when accessed.
+    """
+    tree = APINode('origen_autoapi', lazy=True)
+
+    assert len(tree.directory) == 1
+    assert not tree.is_leaf()
+    assert tree.has_public_api()
+
+    assert len(tree.subnodes) == 2
+    assert len(tree.directory) == 3
+    assert not tree.get_module('origen_autoapi.apinode').is_relevant()
+
+
+def test_import_workers():
+    """
+    Check that importing submodules concurrently builds the same tree.
+    """
+    tree = APINode('origen_autoapi', import_workers=2)
+
+    assert list(tree.directory) == list(APINode('origen_autoapi').directory)
+    assert tree.tree() == APINode('origen_autoapi').tree()
+
+    tree = APINode('origen_autoapi', lazy=True, import_workers=2)
+    assert tree.tree() == APINode('origen_autoapi').tree()
+
+    # Thread pools only live while the subnodes are built
+    threads = threading.active_count()
+    for lazy in (False, True):
+        tree = APINode('origen_autoapi', lazy=lazy, import_workers=2)
+        for node in list(tree.directory.values()):
+            assert node.is_leaf() or node.subnodes
+            assert not hasattr(node, '_executor')
+        assert threading.active_count() == threads
+
+    for import_workers in (0, -1, '2', True):
+        with pytest.raises(ValueError):
+            APINode('origen_autoapi', import_workers=import_workers)
+
+
+def test_process_node_subnodes():
+    """
+    Check that autoapi-process-node handlers can replace the subnodes.
+    """
+    class App(object):
+        def emit(self, event, node):
+            node.subnodes = [
+                subnode for subnode in node.subnodes
+                if subnode.subname != 'sphinx'
+            ]
+
+    tree = APINode('origen_autoapi', context={'app': App()})
+
+    assert [subnode.name for subnode in tree.subnodes] == [
+        'origen_autoapi.apinode'
+    ]
+    assert not tree.subnodes_failed
+    assert not tree.is_leaf()
+    assert [node for node, _ in tree.walk()] == [tree]
+
+
+def test_lazy_failed_leaf(tmp_path, monkeypatch):
+    """
+    Check that lazy and eager trees agree on leaves when a submodule fails to
+    import.
+    """
+    sub = tmp_path / 'failing_pkg' / 'sub'
+    sub.mkdir(parents=True)
+    (tmp_path / 'failing_pkg' / '__init__.py').write_text('')
+    (sub / '__init__.py').write_text('')
+    (sub / 'broken.py').write_text('raise ImportError("broken")\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    for lazy in (False, True):
+        tree = APINode('failing_pkg', lazy=lazy)
+        steps = list(tree.walk())
+        node = tree.get_module('failing_pkg.sub')
+
+        assert node.is_leaf()
+        assert node.subnodes_failed == ['failing_pkg.sub.broken']
+        assert steps == [(tree, [node])]